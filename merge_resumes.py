@@ -1,7 +1,7 @@
 # Filename: merge_resumes.py
-# Version: 1.2.0
+# Version: 1.5.0
 #
-# Merges two DOCX files at the XML level (unzipping, merging, and re-zipping) using only Python standard and pip-installable packages.
+# Merges two DOCX files at the XML level (streaming parts from one ZIP archive into another and merging word/document.xml) using only Python standard and pip-installable packages.
 # No Homebrew/system dependencies required.
 #
 # Prerequisites:
@@ -17,9 +17,9 @@
 #     Merged DOCX file at the path specified by MERGED_PATH
 
 import os
+import re
+import copy
 import zipfile
-import shutil
-import tempfile
 from lxml import etree
 
 # --- Configurable File Paths (macOS/Unix style) ---
@@ -28,53 +28,132 @@ PART1_PATH = '/Users/phobrla/Library/Mobile Documents/com~apple~CloudDocs/Downlo
 PART2_PATH = '/Users/phobrla/Library/Mobile Documents/com~apple~CloudDocs/Downloads/Phil Hobrla - Instructional Designer Resume Part 2.docx'
 MERGED_PATH = '/Users/phobrla/Library/Mobile Documents/com~apple~CloudDocs/Downloads/Phil Hobrla - Instructional Designer Resume - Merged.docx'
 
-def unzip_docx(docx_path, extract_to):
-    """Unzip a .docx file to a given directory."""
-    with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_to)
-
-def rezip_docx(folder_path, output_path):
-    """Zip a folder back into a .docx file."""
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as docx_zip:
-        for foldername, subfolders, filenames in os.walk(folder_path):
-            for filename in filenames:
-                abs_path = os.path.join(foldername, filename)
-                arcname = os.path.relpath(abs_path, folder_path)
-                docx_zip.write(abs_path, arcname)
-
-def merge_document_xml(part1_xml, part2_xml, merged_xml):
+# DEFLATE level for every part written to the merged archive (zlib's 1-9 scale; 6 is the usual size/speed balance)
+DOCX_COMPRESSLEVEL = 6
+
+DOCUMENT_XML = 'word/document.xml'
+# Parts that are already compressed; deflating them again costs CPU for next to no size gain
+PRECOMPRESSED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.tif', '.tiff', '.wdp')
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_BODY = '{%s}body' % W_NS
+W_SECTPR = '{%s}sectPr' % W_NS
+SPLICE_MARKER = 'merge_resumes:body'
+# Parser settings shared by every document.xml parse. iterparse builds its own
+# parser per call, so the settings are kept once here rather than a parser object.
+# - collect_ids=False: skip building the xml:id lookup table, which the merge never uses
+# - huge_tree=True: lift libxml2's size/depth limits for very large documents
+# - resolve_entities=False: leave entities unexpanded (faster, and no XXE)
+ITERPARSE_OPTIONS = dict(remove_blank_text=True, collect_ids=False, huge_tree=True, resolve_entities=False)
+XMLNS_DECL_RE = re.compile(rb' xmlns(?::([^=\s]+))?="([^"]*)"')
+
+def copy_zipinfo(info, compress_type=None, compresslevel=None):
     """
-    Merge the bodies of document.xml files from two DOCX files.
-    - Appends body elements from part2 to part1, preserves final sectPr from part2.
+    Clone a ZipInfo for writing into another archive.
+    - Keeps the entry's name, timestamp, attributes and (unless overridden) compression method.
+    - A fresh object is returned so the source archive's own ZipInfo is never modified by the writer.
+    - zipfile only applies the archive's compresslevel to entries opened by name, so a clone passed to
+      ZipFile.open() needs the level set on it directly (compress_level on 3.13+, _compresslevel before).
+    """
+    clone = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    clone.compress_type = info.compress_type if compress_type is None else compress_type
+    clone.comment = info.comment
+    clone.create_system = info.create_system
+    clone.external_attr = info.external_attr
+    clone.file_size = info.file_size
+    if compresslevel is not None:
+        setattr(clone, 'compress_level' if hasattr(clone, 'compress_level') else '_compresslevel', compresslevel)
+    return clone
+
+def iter_body_children(xml_path):
     """
-    NSMAP = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-    parser = etree.XMLParser(remove_blank_text=True)
+    Stream a document.xml with iterparse instead of building the whole tree.
+    - Yields the <w:body> element as soon as it opens, then each of its direct children once fully parsed.
+    - Children are cleared and dropped after the caller moves on, so only one is held in memory at a time.
+    """
+    for event, el in etree.iterparse(xml_path, events=('start', 'end'), **ITERPARSE_OPTIONS):
+        if event == 'start':
+            if el.tag == W_BODY:
+                yield el
+            continue
+        parent = el.getparent()
+        if parent is None or parent.tag != W_BODY:
+            continue
+        yield el
+        el.clear()
+        while el.getprevious() is not None:
+            del parent[0]
 
-    # Parse both document.xml files
-    tree1 = etree.parse(part1_xml, parser)
-    tree2 = etree.parse(part2_xml, parser)
+def document_shell(body):
+    """
+    Serialize everything around the children of a (still streaming) <w:body>.
+    - Returns (head, tail): the XML declaration, root start tag with its namespace
+      declarations and any elements preceding the body, then the closing tags.
+    """
+    root = body.getparent()
+    shell = etree.Element(root.tag, dict(root.attrib), nsmap=root.nsmap)
+    for sibling in root:
+        if sibling is body:
+            break
+        shell.append(copy.deepcopy(sibling))
+    shell_body = etree.SubElement(shell, body.tag, dict(body.attrib))
+    shell_body.append(etree.Comment(SPLICE_MARKER))
+    data = etree.tostring(shell, xml_declaration=True, encoding='UTF-8', standalone=True)
+    head, tail = data.split(b'<!--' + SPLICE_MARKER.encode() + b'-->')
+    return head, tail
+
+def serialize_child(el, inherited_nsmap):
+    """
+    Serialize one body child, dropping namespace declarations the merged root already provides.
+    - lxml repeats every in-scope declaration on a serialized subtree; only ones that
+      differ from the merged document's root (e.g. prefixes unique to part2) are kept.
+    """
+    data = etree.tostring(el, encoding='UTF-8')
+    end = data.index(b'>')
 
-    body1 = tree1.find('.//w:body', namespaces=NSMAP)
-    body2 = tree2.find('.//w:body', namespaces=NSMAP)
+    def keep(match):
+        prefix = match.group(1).decode() if match.group(1) else None
+        if inherited_nsmap.get(prefix) == match.group(2).decode():
+            return b''
+        return match.group(0)
 
-    # Remove last sectPr from body1 (if present)
-    sectPr1 = body1.find('w:sectPr', namespaces=NSMAP)
-    if sectPr1 is not None:
-        body1.remove(sectPr1)
+    return XMLNS_DECL_RE.sub(keep, data[:end]) + data[end:]
 
-    # Append all children from body2 except its sectPr
-    for child in body2:
-        if child.tag.endswith('sectPr'):
+def merge_document_xml(part1_xml, part2_xml, out):
+    """
+    Merge the bodies of document.xml files from two DOCX files.
+    - part1_xml/part2_xml are paths or binary file objects; the merged XML is written to the binary file object out.
+    - Appends body elements from part2 to part1, preserves final sectPr from part2.
+    - Both inputs are streamed and the output is written incrementally; neither document is held as a full tree.
+    """
+    part1 = iter_body_children(part1_xml)
+    body1 = next(part1)
+    nsmap = body1.nsmap
+    head, tail = document_shell(body1)
+
+    out.write(head)
+
+    # Copy part1's body, minus its sectPr
+    for child in part1:
+        if child.tag == W_SECTPR:
+            continue
+        out.write(serialize_child(child, nsmap))
+
+    # Append all children from part2's body except its sectPr
+    part2 = iter_body_children(part2_xml)
+    next(part2)
+    sectPr2 = None
+    for child in part2:
+        if child.tag == W_SECTPR:
+            if sectPr2 is None:
+                sectPr2 = serialize_child(child, nsmap)
             continue
-        body1.append(child)
+        out.write(serialize_child(child, nsmap))
 
     # Append section properties from part2 at the end
-    sectPr2 = body2.find('w:sectPr', namespaces=NSMAP)
     if sectPr2 is not None:
-        body1.append(sectPr2)
+        out.write(sectPr2)
 
-    # Write merged XML back
-    tree1.write(merged_xml, xml_declaration=True, encoding='UTF-8', standalone='yes')
+    out.write(tail)
 
 def main():
     # Ensure input files exist
@@ -85,35 +164,22 @@ def main():
         print(f"Error: '{PART2_PATH}' not found.")
         exit(1)
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        part1_dir = os.path.join(tmpdir, 'part1')
-        part2_dir = os.path.join(tmpdir, 'part2')
-        merged_dir = os.path.join(tmpdir, 'merged')
-        os.makedirs(part1_dir, exist_ok=True)
-        os.makedirs(part2_dir, exist_ok=True)
-        os.makedirs(merged_dir, exist_ok=True)
-
-        # Unzip both DOCX files
-        unzip_docx(PART1_PATH, part1_dir)
-        unzip_docx(PART2_PATH, part2_dir)
-
-        # Copy all contents of part1 to merged_dir
-        for item in os.listdir(part1_dir):
-            s = os.path.join(part1_dir, item)
-            d = os.path.join(merged_dir, item)
-            if os.path.isdir(s):
-                shutil.copytree(s, d, dirs_exist_ok=True)
+    # Copy every part of part1 straight from one archive into the other;
+    # only word/document.xml is rebuilt, streamed from both inputs.
+    with zipfile.ZipFile(PART1_PATH) as zip1, zipfile.ZipFile(PART2_PATH) as zip2, \
+            zipfile.ZipFile(MERGED_PATH, 'w', zipfile.ZIP_DEFLATED, compresslevel=DOCX_COMPRESSLEVEL) as merged_zip:
+        for info in zip1.infolist():
+            if info.filename == DOCUMENT_XML:
+                merged_info = copy_zipinfo(info, zipfile.ZIP_DEFLATED, DOCX_COMPRESSLEVEL)
+                # Size hint so zipfile can decide up front whether the entry needs ZIP64
+                merged_info.file_size = info.file_size + zip2.getinfo(DOCUMENT_XML).file_size
+                with zip1.open(DOCUMENT_XML) as part1_xml, zip2.open(DOCUMENT_XML) as part2_xml, \
+                        merged_zip.open(merged_info, 'w') as merged_xml:
+                    merge_document_xml(part1_xml, part2_xml, merged_xml)
+            elif info.filename.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+                merged_zip.writestr(copy_zipinfo(info, zipfile.ZIP_STORED), zip1.read(info.filename))
             else:
-                shutil.copy2(s, d)
-
-        # Merge word/document.xml files
-        part1_xml = os.path.join(part1_dir, 'word', 'document.xml')
-        part2_xml = os.path.join(part2_dir, 'word', 'document.xml')
-        merged_xml = os.path.join(merged_dir, 'word', 'document.xml')
-        merge_document_xml(part1_xml, part2_xml, merged_xml)
-
-        # Rezip merged folder into new DOCX
-        rezip_docx(merged_dir, MERGED_PATH)
+                merged_zip.writestr(copy_zipinfo(info), zip1.read(info.filename), compresslevel=DOCX_COMPRESSLEVEL)
 
     print(f"Merged DOCX created at: {MERGED_PATH}")
 
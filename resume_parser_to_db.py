@@ -1,15 +1,22 @@
 import os
 import sys
-import glob
 import sqlite3
-import traceback
-import re
-from typing import List, Dict, Any
+import logging
+import itertools
+import collections
+import hashlib
+import mmap
+import pathlib
+import subprocess
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional
 
 try:
-    from docx import Document
+    from lxml import etree
 except ImportError:
-    print("Missing 'python-docx'. Install with: pip install python-docx")
+    print("Missing 'lxml'. Install with: pip install lxml")
     sys.exit(1)
 
 try:
@@ -24,6 +31,15 @@ except ImportError:
     print("Missing 'PyPDF2'. Install with: pip install PyPDF2")
     sys.exit(1)
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    # Optional: much faster native PDF text extraction; PyPDF2 is used otherwise.
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+LOG_FORMAT = "%(levelname)s: %(message)s"
+
 IGNORE_FILES = {
     '/Users/phobrla/Documents/Career/Application Materials/vollman----interview-notes-unstructured.docx',
     '/Users/phobrla/Documents/Career/Application Materials/Project Manager- IT - Salem, VA 24153 - Indeed.com.pdf',
@@ -57,175 +73,418 @@ IGNORE_FILES = {
     '/Users/phobrla/Documents/Career/Application Materials/Workforce Recruitment Program/Schedule A Lettter II.pdf',
 }
 
+# Section headings recognised by parse_resume, keyed by the lowercased heading
+# with single spaces between words; lookups are a dict hit, not a regex match
+SECTION_ALIASES = {
+    "summary": "summary",
+    "profile": "summary",
+    "objective": "summary",
+    "skills": "skills",
+    "technical skills": "skills",
+    "core competencies": "skills",
+    "experience": "experience",
+    "work history": "experience",
+    "professional experience": "experience",
+    "employment": "experience",
+    "career history": "experience",
+    "education": "education",
+}
+# Every SECTION_ALIASES key starts with one of these letters; lines starting
+# with anything else skip the lookup entirely
+HEADING_FIRST_CHARS = frozenset(alias[0] for alias in SECTION_ALIASES)
+BULLET_PREFIXES = ("-", "*", "•")
+
+RESUME_EXTENSIONS = (".docx", ".doc", ".pdf")
+
+# Connection settings for the bulk load: WAL with synchronous=NORMAL avoids an
+# fsync per commit, temp tables/cache stay in memory (cache_size in KiB), and
+# reads of up to 256 MiB of the DB go through mmap instead of read() calls
+SQLITE_PRAGMAS = (
+    "PRAGMA page_size=8192",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Parsed resumes buffered between scan_resumes and each executemany round
+INSERT_BATCH_SIZE = 64
+
+INSERT_RESUME_SQL = """
+    INSERT INTO resumes (id, filename, filepath, content, header, summary, file_sha1)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+# First free resumes.id: above both the live rows and AUTOINCREMENT's high-water
+# mark, so ids of deleted rows are never reused
+NEXT_RESUME_ID_SQL = """
+    SELECT MAX(
+        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'resumes'), 0),
+        COALESCE((SELECT MAX(id) FROM resumes), 0)
+    ) + 1
+"""
+INSERT_EMPLOYER_SQL = """
+    INSERT INTO employers (resume_id, employer_header, employer_summary, highlights)
+    VALUES (?, ?, ?, ?)
+"""
+INSERT_SKILL_SQL = """
+    INSERT INTO skills (resume_id, skill_header, skills)
+    VALUES (?, ?, ?)
+"""
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY = W_NS + "body"
+W_P = W_NS + "p"
+W_R = W_NS + "r"
+W_HYPERLINK = W_NS + "hyperlink"
+W_T = W_NS + "t"
+W_BR = W_NS + "br"
+# Other run children with a fixed text equivalent, as python-docx maps them
+W_RUN_CHARS = {
+    W_NS + "tab": "\t",
+    W_NS + "ptab": "\t",
+    W_NS + "cr": "\n",
+    W_NS + "noBreakHyphen": "-",
+}
+
 def normalize_path(path: str) -> str:
     return os.path.abspath(os.path.normpath(path))
 
-def should_ignore(file_path: str, ignore_files_norm: set) -> bool:
-    abs_path = normalize_path(file_path)
-    basename = os.path.basename(file_path).lower()
-    if abs_path in ignore_files_norm:
-        return True
-    if 'philhobrlacl' in basename or 'cover letter' in basename:
-        return True
-    return False
+IGNORE_FILES_NORM = frozenset(normalize_path(f) for f in IGNORE_FILES)
+
+def is_ignored_name(basename_lower: str) -> bool:
+    return 'philhobrlacl' in basename_lower or 'cover letter' in basename_lower
+
+def should_ignore(abs_path: str) -> bool:
+    return abs_path in IGNORE_FILES_NORM
+
+def _run_text(run) -> str:
+    parts = []
+    for child in run:
+        if child.tag == W_T:
+            parts.append(child.text or "")
+        elif child.tag == W_BR:
+            # Page and column breaks carry no text
+            if child.get(W_NS + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(W_RUN_CHARS.get(child.tag, ""))
+    return "".join(parts)
+
+def _read_docx_text(file_path: str) -> str:
+    # Stream word/document.xml straight out of the archive, one line per
+    # paragraph. Only what python-docx's Document.paragraphs gave is read:
+    # w:p directly under w:body, and of those only the w:r and w:hyperlink
+    # runs. Table cells, content controls, tracked insertions and text boxes
+    # (including their mc:Fallback copies, which sit inside a run's drawing)
+    # are left out, and their nested w:p never end the host paragraph.
+    paragraphs = []
+    with zipfile.ZipFile(file_path) as z, z.open("word/document.xml") as f:
+        for _, el in etree.iterparse(f, events=("end",), tag=W_P):
+            parent = el.getparent()
+            if parent is None or parent.tag != W_BODY:
+                # Nested paragraph: freed along with its body-level ancestor
+                continue
+            parts = []
+            for child in el:
+                if child.tag == W_R:
+                    parts.append(_run_text(child))
+                elif child.tag == W_HYPERLINK:
+                    parts.extend(_run_text(run) for run in child.iterchildren(W_R))
+            paragraphs.append("".join(parts))
+            # Drop the paragraph and any finished siblings (tables etc.), so
+            # the partial tree stays small however long the document is
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+    return "\n".join(paragraphs)
 
 def extract_text_from_docx(file_path: str) -> str:
+    # Both readers need a ZIP archive; probe once rather than letting each of
+    # them open and fail on the same file
+    if not zipfile.is_zipfile(file_path):
+        raise Exception("not a ZIP archive")
     try:
-        doc = Document(file_path)
-        return "\n".join([para.text for para in doc.paragraphs])
+        return _read_docx_text(file_path)
     except Exception:
         return docx2txt.process(file_path)
 
 def extract_text_from_pdf(file_path: str) -> str:
-    text = ""
-    with open(file_path, "rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+    if pdfium is not None:
+        try:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                # PDFium ends lines with \r\n; store \n like the other extractors
+                text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+                return text.replace("\r\n", "\n")
+            finally:
+                pdf.close()
+        except Exception as e:
+            logger.warning("pypdfium2 failed on '%s', falling back to PyPDF2: %s", file_path, e)
+    # Map the file rather than reading through a file object: PyPDF2 seeks
+    # all over the file, and the OS pages in only the parts it touches
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        reader = PyPDF2.PdfReader(mm)
+        return "".join((page.extract_text() or "") for page in reader.pages)
 
-def extract_text_from_doc(file_path: str) -> str:
-    try:
-        import subprocess
-        import tempfile
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output_docx = os.path.join(tmpdir, "converted.docx")
-            cmd = [
-                "soffice",
-                "--headless",
-                "--convert-to",
-                "docx",
-                "--outdir",
-                tmpdir,
-                file_path
-            ]
+def convert_docs_to_docx(doc_paths: List[str], outdir: str) -> Dict[str, str]:
+    # LibreOffice startup dominates a single conversion, so convert every .doc
+    # in one soffice run. Outputs are named after the input's stem, so files
+    # sharing a stem go to separate batches (and output folders).
+    batches: List[List[str]] = []
+    batch_stems: List[set] = []
+    for path in doc_paths:
+        stem = os.path.splitext(os.path.basename(path))[0].lower()
+        for batch, stems in zip(batches, batch_stems):
+            if stem not in stems:
+                batch.append(path)
+                stems.add(stem)
+                break
+        else:
+            batches.append([path])
+            batch_stems.append({stem})
+
+    # A private profile, shared by every batch: soffice otherwise hands the job
+    # to an already-running LibreOffice (which ignores it), and the profile is
+    # only initialised once
+    profile_uri = pathlib.Path(outdir, "lo-profile").resolve().as_uri()
+    converted = {}
+    for i, batch in enumerate(batches):
+        batch_dir = os.path.join(outdir, str(i))
+        cmd = [
+            "soffice",
+            f"-env:UserInstallation={profile_uri}",
+            "--headless",
+            "--convert-to",
+            "docx",
+            "--outdir",
+            batch_dir,
+            *batch
+        ]
+        try:
             subprocess.run(cmd, capture_output=True, check=True)
+        except Exception as e:
+            logger.warning("Failed to convert %d .doc file(s) with LibreOffice: %s", len(batch), e)
+            continue
+        for path in batch:
+            output_docx = os.path.join(batch_dir, os.path.splitext(os.path.basename(path))[0] + ".docx")
             if os.path.exists(output_docx):
-                return extract_text_from_docx(output_docx)
-            else:
-                raise Exception("Conversion to docx failed.")
-    except Exception as e:
-        print(f"Failed to extract .doc file '{file_path}': {e}")
-        return ""
+                converted[path] = output_docx
+    return converted
+
+def extract_text_from_doc(file_path: str, converted_docs: Dict[str, str]) -> str:
+    # Raise rather than return "" so a failed conversion is not stored (with
+    # its content hash) as an empty resume, and is retried on the next run
+    output_docx = converted_docs.get(file_path)
+    if output_docx is None:
+        raise Exception("Conversion to docx failed.")
+    return extract_text_from_docx(output_docx)
 
 def parse_resume(text: str) -> Dict[str, Any]:
-    # Robust section parsing using regex and section titles
-    sections = {}
+    # Single pass over the lines: section headings switch the current section
+    # and every other non-blank line is consumed by that section directly.
     current_section = "header"
-    sections[current_section] = []
-    lines = [line.strip() for line in text.splitlines()]
-    section_titles = {
-        "summary": re.compile(r"^(summary|profile|objective)$", re.I),
-        "skills": re.compile(r"^(skills|technical\s+skills|core\s+competencies)$", re.I),
-        "experience": re.compile(r"^(experience|work\s+history|professional\s+experience|employment|career\s+history)$", re.I),
-        "education": re.compile(r"^education$", re.I),
-    }
-    current_section_found = False
+    header_lines = []
+    summary_lines = []
+    skill_lines = []
+    has_skills = False
+    employers = []
+    emp = None
+    highlights = []
 
-    for line in lines:
+    for line in text.splitlines():
         line_clean = line.strip()
         found_section = None
-        for name, pat in section_titles.items():
-            if pat.match(line_clean):
-                found_section = name
-                break
+        if line_clean[:1].lower() in HEADING_FIRST_CHARS:
+            key = line_clean.lower()
+            found_section = SECTION_ALIASES.get(key)
+            if found_section is None:
+                # Two-word headings may be separated by any run of whitespace
+                words = key.split(None, 2)
+                if len(words) == 2:
+                    found_section = SECTION_ALIASES.get(" ".join(words))
         if found_section:
             current_section = found_section
-            if current_section not in sections:
-                sections[current_section] = []
-            current_section_found = True
+            if current_section == "skills":
+                has_skills = True
             continue
-        if not current_section_found and not line_clean:
-            # First blank line after header
-            current_section_found = True
+        if not line_clean:
             continue
-        if current_section_found:
-            sections.setdefault(current_section, []).append(line_clean)
-        else:
-            sections[current_section].append(line_clean)
-
-    # Compose outputs
-    header = "\n".join([l for l in sections.get("header", []) if l])
-    summary = " ".join([l for l in sections.get("summary", []) if l])
-    # Parse experiences
-    employers = []
-    if "experience" in sections:
-        exp_lines = sections["experience"]
-        emp = None
-        for line in exp_lines:
-            if not line:
-                continue
-            # Heuristic: employer header likely in Title Case or ALL CAPS, not a bullet
-            if not line.startswith(("-", "*", "•")) and (line.istitle() or line.isupper()):
+        if current_section == "header":
+            header_lines.append(line_clean)
+        elif current_section == "summary":
+            summary_lines.append(line_clean)
+        elif current_section == "skills":
+            skill_lines.append(line_clean)
+        elif current_section == "experience":
+            # Heuristic: employer header likely in Title Case or ALL CAPS, not a bullet.
+            # A line opening with a lowercase letter can be neither, so it never
+            # pays for the two case scans.
+            is_bullet = line_clean.startswith(BULLET_PREFIXES)
+            if (not is_bullet and not line_clean[0].islower()
+                    and (line_clean.istitle() or line_clean.isupper())):
                 if emp:
+                    emp["highlights"] = "\n".join(highlights)
                     employers.append(emp)
-                emp = {"header": line, "summary": "", "highlights": []}
-            elif emp and (line.startswith("•") or line.startswith("-") or line.startswith("*")):
-                emp["highlights"].append(line)
+                emp = {"header": line_clean, "summary": "", "highlights": ""}
+                highlights = []
+            elif emp and is_bullet:
+                highlights.append(line_clean)
             elif emp:
                 if emp["summary"]:
-                    emp["summary"] += " " + line
+                    emp["summary"] += " " + line_clean
                 else:
-                    emp["summary"] = line
-        if emp:
-            employers.append(emp)
+                    emp["summary"] = line_clean
+    if emp:
+        emp["highlights"] = "\n".join(highlights)
+        employers.append(emp)
+
+    # Highlights and skills are joined here, in the newline-separated form the
+    # DB stores, so insert_resume only has to build row tuples
     skills = []
-    if "skills" in sections:
-        skill_lines = [l for l in sections["skills"] if l]
-        skills = [{"header": "Skills", "skills": skill_lines}]
+    if has_skills:
+        skills = [{"header": "Skills", "skills": "\n".join(skill_lines)}]
     return {
-        "header": header,
-        "summary": summary,
+        "header": "\n".join(header_lines),
+        "summary": " ".join(summary_lines),
         "employers": employers,
         "skills": skills
     }
 
-def scan_resumes(folder: str) -> List[Dict[str, Any]]:
-    resumes_data = []
-    file_patterns = ["**/*.docx", "**/*.DOCX", "**/*.doc", "**/*.DOC", "**/*.pdf", "**/*.PDF"]
+def file_sha1(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap refuses empty files
+            return hashlib.sha1().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha1(mm).hexdigest()
+
+def _init_worker_logging(level: int):
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+def _process_one(file_path: str, abs_path: str, converted_docs: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    ext = file_path.lower().split(".")[-1]
+    try:
+        if ext == "docx":
+            text = extract_text_from_docx(file_path)
+        elif ext == "doc":
+            text = extract_text_from_doc(file_path, converted_docs)
+        elif ext == "pdf":
+            text = extract_text_from_pdf(file_path)
+        else:
+            logger.warning("Unsupported file type: %s", file_path)
+            return None
+        if not text.strip():
+            logger.warning("No text extracted from %s", file_path)
+        parsed = parse_resume(text)
+        return {
+            "filename": os.path.basename(file_path),
+            "filepath": abs_path,
+            "content": text.strip(),
+            "header": parsed["header"],
+            "summary": parsed["summary"],
+            "employers": parsed["employers"],
+            "skills": parsed["skills"]
+        }
+    except Exception as e:
+        logger.warning("Failed to extract %s: %s", file_path, e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return None
+
+def _process_chunk(file_paths: List[str], abs_paths: List[str], converted_docs: Dict[str, str]) -> List[Optional[Dict[str, Any]]]:
+    return [_process_one(f, a, converted_docs) for f, a in zip(file_paths, abs_paths)]
+
+def scan_resumes(folder: str, known_hashes: Optional[set] = None) -> Iterator[Dict[str, Any]]:
+    # Generator: each parsed resume is yielded as soon as its worker finishes,
+    # so the caller can store it without the whole corpus being held in memory
+    # One walk of the tree with a case-insensitive extension test. Hidden
+    # files and folders are skipped, as glob's "**" patterns did.
+    # Name-based ignores are applied here, before any path is built or
+    # normalized for the file.
     files = []
-    for pat in file_patterns:
-        files.extend(glob.glob(os.path.join(folder, pat), recursive=True))
-    ignore_files_norm = {normalize_path(f) for f in IGNORE_FILES}
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            name_lower = name.lower()
+            if name.startswith(".") or not name_lower.endswith(RESUME_EXTENSIONS):
+                continue
+            if is_ignored_name(name_lower):
+                logger.debug("Skipping ignored file: %s", os.path.join(root, name))
+                continue
+            files.append(os.path.join(root, name))
+    # Files whose content is already in the DB, or duplicates a file earlier in
+    # this scan, are skipped before any extraction work. Only files that parse
+    # successfully are stored with their hash, so failures are retried later.
+    known_hashes = known_hashes or set()
+    seen_hashes = set()
+    to_process = []
+    to_process_abs = []
+    to_process_hashes = []
     for file_path in files:
-        if should_ignore(file_path, ignore_files_norm):
-            print(f"Skipping ignored file: {file_path}")
+        abs_path = normalize_path(file_path)
+        if should_ignore(abs_path):
+            logger.debug("Skipping ignored file: %s", file_path)
             continue
-        ext = file_path.lower().split(".")[-1]
-        print(f"Parsing: {file_path}")
         try:
-            if ext == "docx":
-                text = extract_text_from_docx(file_path)
-            elif ext == "doc":
-                text = extract_text_from_doc(file_path)
-            elif ext == "pdf":
-                text = extract_text_from_pdf(file_path)
-            else:
-                print(f"Unsupported file type: {file_path}")
-                continue
-            if not text.strip():
-                print(f"WARNING: No text extracted from {file_path}")
-            parsed = parse_resume(text)
-            print(f"  Header: {parsed['header'][:40]}...")
-            print(f"  Summary: {parsed['summary'][:40]}...")
-            print(f"  Employers found: {len(parsed['employers'])}")
-            print(f"  Skills found: {len(parsed['skills'])}")
-            resumes_data.append({
-                "filename": os.path.basename(file_path),
-                "filepath": normalize_path(file_path),
-                "content": text.strip(),
-                "header": parsed["header"],
-                "summary": parsed["summary"],
-                "employers": parsed["employers"],
-                "skills": parsed["skills"]
-            })
-        except Exception as e:
-            print(f"Failed to extract {file_path}: {e}")
-            traceback.print_exc()
-    return resumes_data
+            sha1 = file_sha1(file_path)
+        except OSError as e:
+            logger.warning("Failed to read %s: %s", file_path, e)
+            continue
+        if sha1 in known_hashes:
+            logger.debug("Skipping already ingested file: %s", file_path)
+            continue
+        if sha1 in seen_hashes:
+            logger.debug("Skipping duplicate of a file earlier in this scan: %s", file_path)
+            continue
+        seen_hashes.add(sha1)
+        to_process.append(file_path)
+        to_process_abs.append(abs_path)
+        to_process_hashes.append(sha1)
+    # Extraction and parsing are independent per file, so fan them out over
+    # all cores; results come back in input order.
+    doc_files = [f for f in to_process if f.lower().endswith(".doc")]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        converted_docs = convert_docs_to_docx(doc_files, tmpdir) if doc_files else {}
+        # Chunks amortise the per-task IPC, but a fixed size would leave cores
+        # idle on small folders; aim for ~4 chunks per worker instead, capped
+        # so a single chunk's results stay small
+        workers = min(os.cpu_count() or 1, max(1, len(to_process)))
+        chunksize = max(1, min(INSERT_BATCH_SIZE, len(to_process) // (workers * 4)))
+        # Workers only report problems; per-file progress is logged here in
+        # the parent, so it is neither interleaved nor lost under "spawn"
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_logging,
+                                 initargs=(logging.getLogger().getEffectiveLevel(),)) as ex:
+            # Results are consumed in input order, so finished chunks wait
+            # behind a slow one. Only a couple of chunks per worker are kept in
+            # flight (more are submitted as results are consumed), which bounds
+            # how many can pile up; ex.map would submit the whole corpus at once.
+            starts = iter(range(0, len(to_process), chunksize))
+            pending = collections.deque()
+            while True:
+                for start in itertools.islice(starts, workers * 2 - len(pending)):
+                    end = start + chunksize
+                    pending.append((start, ex.submit(_process_chunk, to_process[start:end],
+                                                     to_process_abs[start:end], converted_docs)))
+                if not pending:
+                    break
+                start, future = pending.popleft()
+                end = start + chunksize
+                for file_path, sha1, result in zip(to_process[start:end], to_process_hashes[start:end], future.result()):
+                    if not result:
+                        continue
+                    logger.debug(
+                        "Parsed %s: header %r, summary %r, %d employers, %d skills sections",
+                        file_path, result["header"][:40], result["summary"][:40],
+                        len(result["employers"]), len(result["skills"])
+                    )
+                    result["file_sha1"] = sha1
+                    yield result
 
-def init_db(db_file: str):
-    conn = sqlite3.connect(db_file)
+def init_db(db_file: str) -> sqlite3.Connection:
+    # Autocommit mode: the caller controls transactions with explicit BEGIN
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    # page_size only takes effect on a new database, before WAL is enabled
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS resumes (
@@ -234,9 +493,15 @@ def init_db(db_file: str):
             filepath TEXT,
             content TEXT,
             header TEXT,
-            summary TEXT
+            summary TEXT,
+            file_sha1 TEXT
         )
     """)
+    # Databases created before content hashing lack the column
+    columns = {row[1] for row in c.execute("PRAGMA table_info(resumes)")}
+    if "file_sha1" not in columns:
+        c.execute("ALTER TABLE resumes ADD COLUMN file_sha1 TEXT")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resumes_file_sha1 ON resumes(file_sha1)")
     c.execute("""
         CREATE TABLE IF NOT EXISTS employers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -256,39 +521,41 @@ def init_db(db_file: str):
             FOREIGN KEY(resume_id) REFERENCES resumes(id)
         )
     """)
-    conn.commit()
-    conn.close()
+    return conn
 
-def insert_resume(db_file: str, resume: Dict[str, Any]):
-    conn = sqlite3.connect(db_file)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO resumes (filename, filepath, content, header, summary)
-        VALUES (?, ?, ?, ?, ?)
-    """, (resume['filename'], resume['filepath'], resume['content'], resume['header'], resume['summary']))
-    resume_id = c.lastrowid
-
-    for emp in resume.get("employers", []):
-        c.execute("""
-            INSERT INTO employers (resume_id, employer_header, employer_summary, highlights)
-            VALUES (?, ?, ?, ?)
-        """, (
-            resume_id,
-            emp.get("header", ""),
-            emp.get("summary", ""),
-            "\n".join(emp.get("highlights", []))
-        ))
-    for s in resume.get("skills", []):
-        c.execute("""
-            INSERT INTO skills (resume_id, skill_header, skills)
-            VALUES (?, ?, ?)
-        """, (
+def load_ingested_hashes(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT file_sha1 FROM resumes WHERE file_sha1 IS NOT NULL")}
+
+def insert_resumes(conn: sqlite3.Connection, resumes: List[Dict[str, Any]]):
+    # Ids are assigned up front so every table is filled with a single
+    # executemany. The caller must hold the write lock (BEGIN IMMEDIATE) so
+    # no other writer can take these ids in between.
+    next_id = conn.execute(NEXT_RESUME_ID_SQL).fetchone()[0]
+    resume_rows = []
+    emp_rows = []
+    skill_rows = []
+    for resume_id, resume in enumerate(resumes, start=next_id):
+        resume_rows.append((
             resume_id,
-            s.get("header", ""),
-            "\n".join(s.get("skills", []))
+            resume['filename'],
+            resume['filepath'],
+            resume['content'],
+            resume['header'],
+            resume['summary'],
+            resume.get('file_sha1')
         ))
-    conn.commit()
-    conn.close()
+        emp_rows.extend(
+            (resume_id, emp["header"], emp["summary"], emp["highlights"])
+            for emp in resume.get("employers", [])
+        )
+        skill_rows.extend(
+            (resume_id, s["header"], s["skills"])
+            for s in resume.get("skills", [])
+        )
+    c = conn.cursor()
+    c.executemany(INSERT_RESUME_SQL, resume_rows)
+    c.executemany(INSERT_EMPLOYER_SQL, emp_rows)
+    c.executemany(INSERT_SKILL_SQL, skill_rows)
 
 def build_master_database(resume_folder: str, db_file: str):
     print(f"Will save DB to: {db_file}")
@@ -298,25 +565,51 @@ def build_master_database(resume_folder: str, db_file: str):
         if not os.access(db_dir, os.W_OK):
             print(f"ERROR: No write permission to folder {db_dir}")
             sys.exit(1)
-        init_db(db_file)
-        print(f"Recursively scanning resumes in folder: {resume_folder}")
-        resumes = scan_resumes(resume_folder)
-        print(f"Found {len(resumes)} resumes to insert.")
-        for resume in resumes:
-            insert_resume(db_file, resume)
+        conn = init_db(db_file)
+        try:
+            known_hashes = load_ingested_hashes(conn)
+            print(f"Recursively scanning resumes in folder: {resume_folder}")
+            # Resumes are written in batches while the scan is still running.
+            # Each batch is one short transaction (one commit instead of one per
+            # resume), so the write lock is not held while files are extracted.
+            inserted = 0
+            resumes = scan_resumes(resume_folder, known_hashes)
+            while True:
+                batch = list(itertools.islice(resumes, INSERT_BATCH_SIZE))
+                if not batch:
+                    break
+                conn.execute("BEGIN IMMEDIATE")
+                insert_resumes(conn, batch)
+                conn.commit()
+                inserted += len(batch)
+            print(f"Inserted {inserted} resumes.")
+            # Child-table indexes are built once the rows are in, rather than
+            # maintained row by row during the load
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_employers_resume ON employers(resume_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_skills_resume ON skills(resume_id)")
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
         print("Master database created/updated successfully.")
     except Exception as e:
         print(f"ERROR: Could not create database at {db_file}: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    # -v/--verbose turns on per-file progress; otherwise only problems are logged
+    verbose = any(arg in ("-v", "--verbose") for arg in sys.argv[1:])
+    args = [arg for arg in sys.argv[1:] if arg not in ("-v", "--verbose")]
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.WARNING, format=LOG_FORMAT)
     resume_folder = '/Users/phobrla/Documents/Career/Application Materials'
     db_file = os.path.join(resume_folder, "master_resumes.db")
-    if len(sys.argv) > 1:
-        resume_folder = sys.argv[1]
+    if len(args) > 0:
+        resume_folder = args[0]
         db_file = os.path.join(resume_folder, "master_resumes.db")
-    if len(sys.argv) > 2:
-        db_file = sys.argv[2]
+    if len(args) > 1:
+        db_file = args[1]
     print(f"Running from: {os.getcwd()}")
     print(f"Input folder: {resume_folder}")
     print(f"DB target: {db_file}")